@@ -1,18 +1,30 @@
 # -*- coding: utf-8 -*-
 
 import copy
+import functools
+import io
 import os.path
 import re
-from configparser import ConfigParser, ParsingError
+import stat
+from configparser import ParsingError
 from inspect import cleandoc
+from sys import intern
 
 from plumbum.core import ComponentMeta, ExtensionPoint, PlumbumError
-from plumbum.util import as_bool
-from plumbum.util.file import AtomicFile, wait_for_file_mtime_change
+from plumbum.util import _false_values, _true_values, as_bool
+from plumbum.util.fast_config import (FastConfigParser, parse,
+                                       parse_with_configparser)
+from plumbum.util.file import (AtomicFile, read_file,
+                                wait_for_file_mtime_change)
 
 _use_default = object()
 
 
+def _intern(name):
+    """Intern `name` when it is a plain `str`; `intern` rejects subclasses."""
+    return intern(name) if type(name) is str else name
+
+
 def _getint(value):
     return int(value or 0)
 
@@ -21,12 +33,17 @@ def _getfloat(value):
     return float(value or 0.0)
 
 
+@functools.lru_cache(maxsize=64)
+def _get_split_re(seps):
+    return re.compile('|'.join(map(re.escape, seps)))
+
+
 def _getlist(value, sep, keep_empty):
     if not value:
         return []
     if isinstance(value, str):
         if isinstance(sep, (list, tuple)):
-            splitted = re.split('|'.join(map(re.escape, sep)), value)
+            splitted = _get_split_re(tuple(sep)).split(value)
         else:
             splitted = value.split(sep)
         items = [item.strip() for item in splitted]
@@ -36,6 +53,45 @@ def _getlist(value, sep, keep_empty):
         items = [item for item in items if item not in (None, '')]
     return items
 
+
+@functools.lru_cache(maxsize=256)
+def _normalize_list_string(value, sep, keep_empty):
+    """Normalize the string value of a `ListOption`, joining its items with
+    the first separator.
+
+    Only strings are cached: items of other types may compare equal while
+    being written differently (e.g. `1` and `True`).
+    """
+    items = _getlist(value, sep, keep_empty)
+    if isinstance(sep, tuple):
+        sep = sep[0]
+    return sep.join(items)
+
+
+@functools.lru_cache(maxsize=64)
+def _component_pattern(component):
+    """Return the lowercased dotted parts of a component name or module
+    pattern, as matched against the start of component class paths.
+    """
+    if component.endswith('.*'):
+        component = component[:-2]
+    return tuple(component.lower().split('.'))
+
+
+def _parse_file(filename):
+    """Parse a configuration file and return its sections as a dict."""
+    try:
+        with open(filename, encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        raise PlumbumError("Error reading '{}', make sure it is "
+                           "readable.".format(filename))
+    sections = parse(text)
+    if sections is None:
+        sections = parse_with_configparser(text, filename)
+    return sections
+
+
 def deepcopy_parser(parser):
     copied = parser.__class__()
     copied._sections = copy.deepcopy(parser._sections)
@@ -51,12 +107,24 @@ class Configuration(object):
 
     def __init__(self, filename, params={}):
         self.filename = filename
-        self.parser = ConfigParser(strict=False)
+        self.parser = FastConfigParser()
         self.parents = []
-        self._lastmtime = 0
+        self._laststat = None
         self._sections = {}
+        self._cache = {}
         self.parse_if_needed(force=True)
 
+    @classmethod
+    def from_string(cls, text):
+        """Return a configuration without a file, read from the INI `text`."""
+        config = cls(None)
+        try:
+            config.parser.read_string(text)
+        except ParsingError as e:
+            raise PlumbumError(e)
+        config._pristine_parser = deepcopy_parser(config.parser)
+        return config
+
     def __repr__(self):
         return '<{} {}>'.format(self.__class__.__name__, self.filename)
 
@@ -64,12 +132,14 @@ class Configuration(object):
         """Return whether the configuration contains a section of the given
         name.
         """
-        return name in self.sections()
+        return self.parser.has_section(name) or \
+               any(name in parent for parent in self.parents) or \
+               any(section == name for section, key in Option.registry)
 
     def __getitem__(self, name):
         """Return the configuration section with the specified name."""
         if name not in self._sections:
-            self._sections[name] = Section(self, name)
+            self._sections[name] = Section(self, _intern(name))
         return self._sections[name]
 
     @property
@@ -82,7 +152,10 @@ class Configuration(object):
 
         Valid default input is a string. Return a string.
         """
-        return self[section].get(key, default)
+        try:
+            return self._cache[(section, key)]
+        except KeyError:
+            return self[section].get(key, default)
 
     def getbool(self, section, key, default=''):
         """Return the specified option as boolean value.
@@ -167,6 +240,15 @@ class Configuration(object):
         """
         return self[section].options(compmgr)
 
+    def update(self, values):
+        """Change several configuration values at once.
+
+        `values` is a dict mapping section names to dicts of option names and
+        values. These changes are not persistent unless saved with `save()`.
+        """
+        for section, options in values.items():
+            self[section].update(options)
+
     def remove(self, section, key):
         """Remove the specified option."""
         self[section].remove(key)
@@ -182,7 +264,8 @@ class Configuration(object):
         for parent in self.parents:
             sections.update(parent.sections(compmgr, default=False))
         if default:
-            sections.update(self.defaults(compmgr))
+            sections.update(section for section, key
+                            in Option.get_registry(compmgr))
         return sorted(sections)
 
     def has_option(self, section, option, defaults=True):
@@ -221,7 +304,7 @@ class Configuration(object):
                 sections.append((section, sorted(options)))
 
         # Prepare new file contents to write to disk.
-        parser = ConfigParser()
+        parser = FastConfigParser()
         for section, options in sections:
             parser.add_section(section)
             for key, val in options:
@@ -239,19 +322,25 @@ class Configuration(object):
             self._pristine_parser = deepcopy_parser(self.parser)
 
     def parse_if_needed(self, force=False):
-        if not self.filename or not self.exists:
+        if not self.filename:
+            return False
+        try:
+            st = os.stat(self.filename)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode):
             return False
 
         changed = False
-        modtime = os.path.getmtime(self.filename)
-        if force or modtime != self._lastmtime:
+        # The file is only parsed again when its stat signature changed
+        laststat = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+        if force or laststat != self._laststat:
             try:
-                if not self.parser.read(self.filename):
-                    raise PlumbumError("Error reading '{}', make sure it is "
-                                     "readable.".format(self.filename))
+                sections = _parse_file(self.filename)
             except ParsingError as e:
                 raise PlumbumError(e)
-            self._lastmtime = modtime
+            self.parser.read_dict(sections)
+            self._laststat = laststat
             # self._pristine_parser = copy.deepcopy(self.parser)
             self._pristine_parser = deepcopy_parser(self.parser)
             changed = True
@@ -264,6 +353,7 @@ class Configuration(object):
 
         if changed:
             self._sections = {}
+            self._cache = {}
         return changed
 
     def touch(self):
@@ -284,12 +374,10 @@ class Configuration(object):
                 self.set(section, name, value)
 
         if component:
-            if component.endswith('.*'):
-                component = component[:-2]
-            component = component.lower().split('.')
+            component = _component_pattern(component)
             for cls in ComponentMeta._components:
-                clsname = (cls.__module__ + '.' + cls.__name__).lower()\
-                                                               .split('.')
+                clsname = tuple((cls.__module__ + '.' + cls.__name__)
+                                .lower().split('.'))
                 if clsname[:len(component)] == component:
                     for option in cls.__dict__.values():
                         if isinstance(option, Option):
@@ -312,10 +400,20 @@ class Configuration(object):
     def _write(self, parser):
         if not self.filename:
             return
+        buf = io.StringIO()
+        buf.write('# -*- coding: utf-8 -*-\n\n')
+        parser.write(buf)
+        data = buf.getvalue().encode('utf-8')
+        # Leave the file (and its modification time) alone when saving
+        # wouldn't change its content
+        try:
+            if read_file(self.filename, 'rb') == data:
+                return
+        except OSError:
+            pass
         wait_for_file_mtime_change(self.filename)
-        with AtomicFile(self.filename, 'w') as fd:
-            fd.writelines(['# -*- coding: utf-8 -*-\n', '\n'])
-            parser.write(fd)
+        with AtomicFile(self.filename, 'wb') as fd:
+            fd.write(data)
 
 
 class Section(object):
@@ -323,12 +421,11 @@ class Section(object):
 
     Objects of this class should not be instantiated directly.
     """
-    __slots__ = ('config', 'name', '_cache')
+    __slots__ = ('config', 'name')
 
     def __init__(self, config, name):
         self.config = config
         self.name = name
-        self._cache = {}
 
     def __repr__(self):
         return '<{} [{}]>'.format(self.__class__.__name__, self.name)
@@ -372,7 +469,7 @@ class Section(object):
 
         Valid default input is a string. Return a string
         """
-        cached = self._cache.get(key, _use_default)
+        cached = self.config._cache.get((self.name, key), _use_default)
         if cached is not _use_default:
             return cached
         if self.config.parser.has_option(self.name, key):
@@ -391,7 +488,7 @@ class Section(object):
                     value = _use_default
         if value is _use_default:
             return default
-        self._cache[key] = value
+        self.config._cache[(self.name, key)] = value
         return value
 
     def getbool(self, key, default=''):
@@ -478,18 +575,33 @@ class Section(object):
 
         These changes are not persistent unless saved with `save()`.
         """
-        self._cache.pop(key, None)
+        self.config._cache.pop((self.name, key), None)
         if not self.config.parser.has_section(self.name):
             self.config.parser.add_section(self.name)
         return self.config.parser.set(self.name, key, str(value) if value is not None else '')
 
+    def update(self, values):
+        """Change several configuration values at once, from a dict mapping
+        keys to values.
+
+        Like for `set()`, the changes won't persist until `save()` gets
+        called.
+        """
+        cache = self.config._cache
+        parser = self.config.parser
+        if not parser.has_section(self.name):
+            parser.add_section(self.name)
+        for key, value in values.items():
+            cache.pop((self.name, key), None)
+            parser.set(self.name, key, str(value) if value is not None else '')
+
     def remove(self, key):
         """Delete a key from this section.
 
         Like for `set()`, the changes won't perist until `save()` gets called.
         """
         if self.config.parser.has_section(self.name):
-            self._cache.pop(key, None)
+            self.config._cache.pop((self.name, key), None)
             self.config.parser.remove_option(self.name, key)
 
 
@@ -529,7 +641,7 @@ class ConfigSection(object):
 
     def __init__(self, name, doc, doc_domain='plumbumcfg', doc_args=None):
         """Create the configuration section."""
-        self.name = name
+        self.name = _intern(name)
         self.registry[self.name] = self
         self.__doc__ = cleandoc(doc)
         self.doc_domain = doc_domain
@@ -589,8 +701,8 @@ class Option(object):
         @param default: the default value for the option
         @param doc: documentation of the option
         """
-        self.section = section
-        self.name = name
+        self.section = _intern(section)
+        self.name = _intern(name)
         self.default = self.normalize(default)
         self.registry[(self.section, self.name)] = self
         self.__doc__ = cleandoc(doc).strip()
@@ -631,7 +743,14 @@ class BoolOption(Option):
     def accessor(self, section, name, default):
         return section.getbool(name, default)
 
+    # Boolean value of the strings most commonly stored for the option,
+    # looked up before falling back to `as_bool`
+    _values = dict.fromkeys(_true_values, True)
+    _values.update(dict.fromkeys(_false_values, False))
+
     def normalize(self, value):
+        if isinstance(value, str):
+            value = self._values.get(value, value)
         if value not in (True, False):
             value = as_bool(value)
         return self.dumps(value)
@@ -686,6 +805,11 @@ class ListOption(Option):
         return Option.dumps(self, value)
 
     def normalize(self, value):
+        if isinstance(value, str):
+            sep = self.sep
+            if isinstance(sep, list):
+                sep = tuple(sep)
+            return _normalize_list_string(value, sep, self.keep_empty)
         return self.dumps(_getlist(value, self.sep, self.keep_empty))
 
 
@@ -700,7 +824,7 @@ class ChoiceOption(Option):
                  doc_args=None):
         Option.__init__(self, section, name, str(choices[0]), doc, doc_domain,
                         doc_args)
-        self.choices = set(str(c).strip() for c in choices)
+        self.choices = frozenset(str(c).strip() for c in choices)
 
     def accessor(self, section, name, default):
         value = section.get(name, default)
@@ -70,6 +70,9 @@ class ComponentMeta(type):
         """Create the component class."""
 
         new_class = type.__new__(mcs, name, bases, d)
+        # Lowercased `module.ClassName`, used to match the component against
+        # the rules of the `[components]` section
+        new_class._full_name = (new_class.__module__ + '.' + name).lower()
         if name == 'Component':
             # Don't put the Component base class in the registry
             return new_class
@@ -134,7 +134,7 @@ class PlumbumInstance(Component, ComponentManager):
         `($(thread)d) PB[$(basename)s:$(module)s] $(levelname)s: $(message)s`
         """)
 
-    def __init__(self, path, create=False, options=[]):
+    def __init__(self, path, create=False, options=[], create_sample=True):
         """Initialize the Plumbum instance.
 
         :param path:   the absolute path to the Plumbum instance
@@ -143,6 +143,8 @@ class PlumbumInstance(Component, ComponentManager):
                        already exists.
         :param options: A list of `(section, name, value)` tuples that define
                        configuration options
+        :param create_sample: if `False`, no sample configuration file is
+                              written when creating the instance.
         """
         ComponentManager.__init__(self)
 
@@ -151,7 +153,7 @@ class PlumbumInstance(Component, ComponentManager):
         self.config = None
 
         if create:
-            self.create(options)
+            self.create(options, create_sample)
             for setup_participant in self.setup_participants:
                 setup_participant.instance_created()
         else:
@@ -202,10 +204,14 @@ class PlumbumInstance(Component, ComponentManager):
         component.log = self.log
 
     def _component_name(self, name_or_class):
-        name = name_or_class
-        if not isinstance(name_or_class, str):
-            name = name_or_class.__module__ + '.' + name_or_class.__name__
-        return name.lower()
+        if isinstance(name_or_class, str):
+            return name_or_class.lower()
+        # Computed once by `ComponentMeta` for component classes
+        name = getattr(name_or_class, '_full_name', None)
+        if name is None:
+            name = (name_or_class.__module__ + '.' +
+                    name_or_class.__name__).lower()
+        return name
 
     @lazy
     def _component_rules(self):
@@ -266,13 +272,14 @@ class PlumbumInstance(Component, ComponentManager):
         if tid is None:
             log.shutdown(self.log)
 
-    def create(self, options=[]):
+    def create(self, options=[], create_sample=True):
         """Create the basic directory structure of the instance, initialize the
         database and populate the configuration file with default values.
 
         If options contains ('inherit', 'file'), default values will not be
         loaded; they are expected to be provided by that file or other
-        options.
+        options. The sample configuration file is only created when
+        `create_sample` is `True`.
         """
         # Create the directory structure
         if not os.path.exists(self.path):
@@ -289,7 +296,8 @@ class PlumbumInstance(Component, ComponentManager):
 
         # Setup the default configuration
         os.mkdir(self.conf_dir)
-        create_file(self.config_file_path + '.sample')
+        if create_sample:
+            create_file(self.config_file_path + '.sample')
         config = Configuration(self.config_file_path)
         for section, name, value in options:
             config.set(section, name, value)
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import enum
+
 from plumbum.models import db
 
 
@@ -15,6 +17,20 @@ class ProductCategory(db.Model):
     __tablename__ = 'product_category'
 
 
+class ProductStatus(enum.IntEnum):
+    """Status of a |product|, stored as a small integer."""
+
+    #: the product is availbale and can be used on  |purchase|/|sale|
+    AVAILABLE = 1
+
+    #: the  product is closed, that is, ti still exists for references
+    #: but it should not be posible to create a |purchase|/|sale| with it
+    CLOSED = 2
+
+    #: the product is suspended, that is, it still exists for future references but it should no be possile to create |purchase|/|sale| with it
+    SUSPENDED = 3
+
+
 class Product(db.Model):
     """A Product is a thing that can be:
 
@@ -27,15 +43,17 @@ class Product(db.Model):
     """
     __tablename__ = 'product'
 
-    #: the product is availbale and can be used on  |purchase|/|sale|
-    STATUS_AVAILABLE = 'STATUS_AVAILABLE'
-
-    #: the  product is closed, that is, ti still exists for references
-    #: but it should not be posible to create a |purchase|/|sale| with it
-    STATUS_CLOSED = 'STATUS_CLOSED'
-
-    #: the product is suspended, that is, it still exists for future references but it should no be possile to create |purchase|/|sale| with it
-    STATUS_SUSPENDED = 'STATUS_SUSPENDED'
+    STATUS_AVAILABLE = ProductStatus.AVAILABLE
+    STATUS_CLOSED = ProductStatus.CLOSED
+    STATUS_SUSPENDED = ProductStatus.SUSPENDED
+
+    #: the product status, one of `ProductStatus`
+    status = db.Column(db.SmallInteger, nullable=False,
+                       default=ProductStatus.AVAILABLE,
+                       server_default=str(ProductStatus.AVAILABLE.value))
+    # Upgrading an existing database: the column is new, add it with
+    #   ALTER TABLE product ADD COLUMN status SMALLINT NOT NULL DEFAULT 1;
+    # the server default marks all existing products as available.
 
 
 class ProductHistory(db.Model):
@@ -1,25 +1,36 @@
 # -*- coding: utf-8 -*-
 
+import enum
+from types import MappingProxyType
+
 from plumbum.models import db
 
 
-class TaxConstant(db.Model):
-    __tablename__ = 'tax_constant'
+class TaxOperationType(enum.IntEnum):
+    """Operation a tax constant applies to, stored as a small integer."""
 
     #: used for sale operations
-    OPERATION_SALE = 'OPERATION_SALE'
+    SALE = 1
 
     #: used for purchase operation
-    OPERATION_PURCHASE = 'OPERATION_PURCHASE'
+    PURCHASE = 2
 
     #: used for other operations
-    OPERATION_OTHERS = 'OPERATION_OTHERS'
+    OTHERS = 3
+
+
+class TaxConstant(db.Model):
+    __tablename__ = 'tax_constant'
+
+    OPERATION_SALE = TaxOperationType.SALE
+    OPERATION_PURCHASE = TaxOperationType.PURCHASE
+    OPERATION_OTHERS = TaxOperationType.OTHERS
 
-    _operation_types = {
+    _operation_types = MappingProxyType({
         OPERATION_SALE: 'Venta',
         OPERATION_PURCHASE: 'Compra',
-        OPERATION_OTHER: 'Otras operaciones',
-    }
+        OPERATION_OTHERS: 'Otras operaciones',
+    })
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -32,7 +43,16 @@ class TaxConstant(db.Model):
     #: applicable tax value
     value = db.Column(db.Numeric(10, 4), nullable=False)
 
-    #: operation type
-    operation_type = db.Column(db.Enum(*_operation_types.keys(),
-                                       name='tax_constant_operation_type'),
-                               default=OPERATION_SALE)
+    #: the operation type, one of `TaxOperationType`
+    operation_type = db.Column(db.SmallInteger,
+                               default=TaxOperationType.SALE,
+                               server_default=str(TaxOperationType.SALE.value))
+    # Upgrading an existing database: the column used to hold the names of
+    # the `tax_constant_operation_type` enum, convert them with
+    #   ALTER TABLE tax_constant ALTER COLUMN operation_type DROP DEFAULT;
+    #   ALTER TABLE tax_constant ALTER COLUMN operation_type TYPE SMALLINT
+    #     USING CASE operation_type WHEN 'OPERATION_SALE' THEN 1
+    #                               WHEN 'OPERATION_PURCHASE' THEN 2
+    #                               WHEN 'OPERATION_OTHERS' THEN 3 END;
+    #   ALTER TABLE tax_constant ALTER COLUMN operation_type SET DEFAULT 1;
+    #   DROP TYPE tax_constant_operation_type;
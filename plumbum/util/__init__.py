@@ -6,6 +6,10 @@ import functools
 from plumbum.util.file import rename
 
 
+_true_values = frozenset(('yes', 'true', 'enabled', 'on', '1'))
+_false_values = frozenset(('no', 'false', 'disabled', 'off', '0'))
+
+
 def as_bool(value, default=False):
     """Convert the given value to a `bool`.
 
@@ -14,16 +18,15 @@ def as_bool(value, default=False):
     the argument converted to a `bool`, or `default` if the conversion fails.
     """
     if isinstance(value, str):
+        value = value.strip().lower()
+        if value in _true_values:
+            return True
+        if value in _false_values:
+            return False
         try:
             return bool(float(value))
         except ValueError:
-            value = value.strip().lower()
-            if value in ('yes', 'true', 'enabled', 'on'):
-                return True
-            elif value in ('no', 'false', 'disabled', 'off'):
-                return False
-            else:
-                return default
+            return default
     try:
         return bool(value)
     except (TypeError, ValueError):
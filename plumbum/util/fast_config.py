@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+import re
+from configparser import (DEFAULTSECT, ConfigParser, DuplicateSectionError,
+                          NoOptionError, NoSectionError)
+from sys import intern
+
+# Matches one whole line: a section header, an option, a full-line comment
+# or a blank line. Lines matching none of them produce no match at all.
+# `[^\S\n]` is any whitespace but a newline, including non-ASCII whitespace
+# that `str.strip()` removes in `ConfigParser`.
+_LINE_RE = re.compile(r"""
+    ^(?:
+        \[([^\n]+)\]                         # [section]
+      | ([^\s\[#;=:][^\n=:]*?)               # option = value
+        [^\S\n]*[=:][^\S\n]*([^\n]*?)
+      | [^\S\n]*[#;][^\n]*                   # comment
+      |                                      # blank line
+    )[^\S\n]*$
+    """, re.MULTILINE | re.VERBOSE)
+
+
+def _optionxform(optionstr):
+    return optionstr.lower()
+
+
+def _format_option(key, value):
+    """Return the line written for an option, escaping multi-line values."""
+    value = str(value).replace('\n', '\n\t') if value is not None else ''
+    return '{} = {}\n'.format(key, value)
+
+
+def parse(text):
+    """Parse the given INI text and return a `{section: {option: value}}`
+    dict.
+
+    Only the syntax used by plain configuration files is handled: section
+    headers, `key = value` (or `key: value`) lines, full-line comments and
+    blank lines. `None` is returned when anything else is found (continuation
+    lines, a `DEFAULT` section, options outside of a section, ...) so the
+    caller can fall back to `ConfigParser`.
+
+    Section and option names are interned, like the names declared by
+    `plumbum.config.Option`, so looking them up compares identities.
+    """
+    if '\r' in text:
+        return None
+    lines = _LINE_RE.findall(text)
+    if len(lines) != text.count('\n') + 1:
+        return None  # some lines didn't match
+    sections = {}
+    options = None
+    for name, key, value in lines:
+        if name:
+            if name == DEFAULTSECT:
+                return None
+            options = sections.setdefault(intern(name), {})
+        elif key:
+            if options is None:
+                return None
+            options[intern(_optionxform(key))] = value
+    return sections
+
+
+def parse_with_configparser(text, source='<string>'):
+    """Parse the given INI text with `ConfigParser` and return the same
+    `{section: {option: value}}` dict as `parse`.
+
+    This handles the whole INI syntax, for the text `parse` gives up on.
+    """
+    parser = ConfigParser(strict=False, interpolation=None)
+    parser.read_string(text, source)
+    return dict((name, dict(parser.items(name, raw=True)))
+                for name in parser.sections())
+
+
+class FastConfigParser(object):
+    """Minimal replacement for `ConfigParser` backed by a plain dict.
+
+    It implements the subset of the `ConfigParser` API used by
+    `plumbum.config.Configuration`. Values are not interpolated, and files
+    using syntax not handled by `parse` are delegated to `ConfigParser`.
+    """
+
+    def __init__(self):
+        self._sections = {}
+
+    optionxform = staticmethod(_optionxform)
+
+    def sections(self):
+        return list(self._sections)
+
+    def has_section(self, section):
+        return section in self._sections
+
+    def add_section(self, section):
+        if section == DEFAULTSECT:
+            raise ValueError("Invalid section name: {!r}".format(section))
+        if section in self._sections:
+            raise DuplicateSectionError(section)
+        self._sections[section] = {}
+
+    def options(self, section):
+        try:
+            return list(self._sections[section])
+        except KeyError:
+            raise NoSectionError(section) from None
+
+    def has_option(self, section, option):
+        options = self._sections.get(section)
+        return options is not None and self.optionxform(option) in options
+
+    def get(self, section, option):
+        try:
+            options = self._sections[section]
+        except KeyError:
+            raise NoSectionError(section) from None
+        try:
+            return options[self.optionxform(option)]
+        except KeyError:
+            raise NoOptionError(option, section) from None
+
+    def set(self, section, option, value=None):
+        try:
+            options = self._sections[section]
+        except KeyError:
+            raise NoSectionError(section) from None
+        options[self.optionxform(option)] = value
+
+    def remove_option(self, section, option):
+        try:
+            options = self._sections[section]
+        except KeyError:
+            raise NoSectionError(section) from None
+        return options.pop(self.optionxform(option), None) is not None
+
+    def read(self, filenames, encoding=None):
+        """Read and parse the given filename or list of filenames.
+
+        Files that cannot be opened are silently ignored. Return the list of
+        successfully read files.
+        """
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        read_ok = []
+        for filename in filenames:
+            try:
+                with open(filename, encoding=encoding) as f:
+                    text = f.read()
+            except OSError:
+                continue
+            self.read_string(text, filename)
+            read_ok.append(filename)
+        return read_ok
+
+    def read_string(self, string, source='<string>'):
+        """Parse configuration data from a string, merging it into the
+        current sections.
+        """
+        sections = parse(string)
+        if sections is None:
+            sections = parse_with_configparser(string, source)
+        self.read_dict(sections)
+
+    def read_dict(self, dictionary):
+        """Merge the given `{section: {option: value}}` dict into the current
+        sections.
+
+        The given dict is not modified nor referenced afterwards.
+        """
+        for name, options in dictionary.items():
+            self._sections.setdefault(name, {}).update(options)
+
+    def write(self, fp):
+        """Write the configuration in INI format to the given file object."""
+        for section, options in self._sections.items():
+            fp.write('[{}]\n'.format(section))
+            fp.writelines(_format_option(key, value)
+                          for key, value in options.items())
+            fp.write('\n')
@@ -177,18 +177,40 @@ class AtomicFile(object):
         return self._file is None or self._file.closed
 
 
+# `os.open` flags for the modes supported by `create_file`
+_create_flags = dict(
+    (mode + suffix, os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0) |
+                    flag)
+    for mode, flag in (('w', os.O_TRUNC), ('a', os.O_APPEND),
+                       ('x', os.O_EXCL))
+    for suffix in ('', 't', 'b'))
+
+
 def create_file(path, data='', mode='w'):
     """Create a new file with the given data.
 
+    The data is written with a single `os.write` call (or as few as the
+    system allows). Text is encoded to UTF-8.
+
     :data: string or iterable of strings.
+    :mode: `'w'` to truncate the file, `'a'` to append to it or `'x'` to
+           fail if it exists, optionally followed by `'t'` or `'b'`.
     """
-    with open(path, mode) as f:
-        if data:
-            # TODO: Encode data to utf-8
-            if isinstance(data, str):
-                f.write(data)
-            else: # Assume iterable
-                f.writelines(data)
+    try:
+        flags = _create_flags[mode]
+    except KeyError:
+        raise ValueError("invalid mode: {!r}".format(mode)) from None
+    if not isinstance(data, (str, bytes)): # Assume iterable
+        data = ''.join(data) if 'b' not in mode else b''.join(data)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd = os.open(path, flags, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
 
 def read_file(path, mode='r'):
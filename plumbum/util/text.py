@@ -2,6 +2,7 @@
 
 import sys
 
+
 def stream_encoding(stream):
     """Return the appropriate encoding for the given stream."""
     encoding = getattr(stream, 'encoding', None)
@@ -16,10 +17,13 @@ def console_print(out, *args, **kwargs):
     :param kwargs: ``newline`` controls whether a newline will be appended
                    (defaults to `True`)
     """
-    const_charset = stream_encoding(out)
-    out.write(' '.join([a.encode(cons_charset, 'replace') for a in args]))
+    charset = stream_encoding(out)
+    text = ' '.join(str(a) for a in args)
     if kwargs.get('newline', True):
-        out.write('\n')
+        text += '\n'
+    # Encode once for the whole line, replacing unencodable characters, and
+    # issue a single write to the stream
+    out.write(text.encode(charset, 'replace').decode(charset))
 
 
 def printout(*args, **kwargs):
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from setuptools import setup, find_packages
+from setuptools import setup
 from codecs import open
 from os import path
 
@@ -19,7 +19,14 @@ setup(
     platforms = 'any',
     license = 'MIT',
 
-    packages = find_packages(exclude=['tests']),
+    packages = [
+        'plumbum',
+        'plumbum.admin',
+        'plumbum.commands',
+        'plumbum.models',
+        'plumbum.util',
+        'plumbum.web',
+    ],
 
     install_requires = [
         'SQLAlchemy',
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'components: the test defines `Component` subclasses and '
+                   'needs a private component registry')
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-import shutil
+import copy
 import os
 import time
 import contextlib
@@ -12,124 +12,222 @@ from plumbum.config import (
     OrderedExtensionsOption, ConfigSection
 )
 from plumbum.core import Component, ComponentMeta, Interface, implements
-from plumbum.util.file import (
-    create_file, read_file, wait_for_file_mtime_change
-)
-from plumbum.util.datefmt import time_now
+from plumbum.util.file import create_file, read_file
+
+from tests.utils import CopyOnWriteRegistry, InstanceStub
 
-from tests.utils import InstanceStub, mkdtemp
+
+def _bump_mtime(filename, mtime_ns):
+    """Set the modification time of `filename` past `mtime_ns`, without
+    waiting for the clock to tick on file systems with coarse timestamps.
+    """
+    t = max(mtime_ns + 1, time.time_ns())
+    os.utime(filename, ns=(t, t))
+    if os.stat(filename).st_mtime_ns == mtime_ns:
+        # The file system truncated the timestamp, move a whole second ahead
+        t = mtime_ns + 1000000000
+        os.utime(filename, ns=(t, t))
 
 
 def _write(filename, lines):
-    wait_for_file_mtime_change(filename)
-    create_file(filename, '\n'.join(lines + ['']))#.encode('utf-8'))
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+    except OSError:
+        mtime = None  # file doesn't exist yet
+    create_file(filename, ''.join(line + '\n' for line in lines)
+                                 .encode('utf-8'), 'wb')
+    if mtime is not None:
+        _bump_mtime(filename, mtime)
+
+
+def _strip_drive(path):
+    """Return `path` without its drive and with forward slashes."""
+    return os.path.splitdrive(path)[1].replace('\\', '/')
+
+
+def _read_bytes(filename):
+    return read_file(filename, 'rb')
 
 
 def _read(filename):
-    return read_file(filename).decode('utf-8')
+    return _read_bytes(filename).decode('utf-8')
 
 
 def readlines(filename):
-    with open(filename, 'r') as f:
-        return f.readlines()
+    return _read(filename).splitlines(keepends=True)
+
+
+@contextlib.contextmanager
+def _registry_snapshot(components=False):
+    """Give the block empty option and section registries, and with
+    `components` a copy-on-write component registry, restoring the
+    original registries on exit.
+    """
+    saved = ConfigSection.registry, Option.registry
+    if components:
+        saved_components = ComponentMeta._components, ComponentMeta._registry
+        ComponentMeta._components = ComponentMeta._components.copy()
+        ComponentMeta._registry = CopyOnWriteRegistry(ComponentMeta._registry)
+    ConfigSection.registry, Option.registry = {}, {}
+    try:
+        yield
+    finally:
+        ConfigSection.registry, Option.registry = saved
+        if components:
+            ComponentMeta._components, ComponentMeta._registry = \
+                saved_components
+
+
+# Default of `test_read_and_getlist_false_values`, and the items `getlist`
+# keeps from it when empty values are dropped
+_FALSE_VALUES = (None, False, '', 'foo', u'', u'bar',
+                 0, 0, 0.0, 0j, 42, 43.0)
+_FALSE_EXPECTED = (False, 'foo', u'bar', 0, 0, 0.0, 0j, 42, 43.0)
+
+# Lines of the files saved by the `set_defaults` tests
+_SAVED_HEADER = ['# -*- coding: utf-8 -*-\n', '\n']
+_SAVED_COMPA = ['[compa]\n', 'opt1 = 1\n', 'opt2 = a\n', '\n']
+_SAVED_COMPB = ['[compb]\n', 'opt3 = 2\n', 'opt4 = b\n', '\n']
+
+# File saved by `test_option_with_non_normal_default`
+_SAVED_NON_NORMAL = (b'# -*- coding: utf-8 -*-\n'
+                     b'\n'
+                     b'[a]\n'
+                     b'bool-0 = disabled\n'
+                     b'bool-1 = enabled\n'
+                     b'bool-no = disabled\n'
+                     b'bool-yes = enabled\n'
+                     b'float-0 = 0.0\n'
+                     b'int-0 = 0\n'
+                     b'\n')
+
+
+@pytest.fixture(scope='class')
+def shared_config():
+    """Build the configuration and declare the default options once for
+    all tests of the class.
+    """
+    config = Configuration(None)
+    config.parser.read_dict({
+        'séction1': {'öption1': 'cönfig-valué',
+                     'öption4': 'cönfig-valué'},
+    })
+    parent_config = Configuration(None)
+    parent_config.parser.read_dict({
+        'séction1': {'öption1': 'cönfig-valué',
+                     'öption2': 'înherited-valué'},
+        'séction2': {'öption2': 'înherited-valué'},
+    })
+    config.parents = [parent_config]
+
+    # The options only need to be in the registry, no class body is
+    # needed to hold them
+    orig = Option.registry
+    Option.registry = {}
+    for section, name in (('séction1', 'öption1'),
+                          ('séction1', 'öption2'),
+                          ('séction1', 'öption3'),
+                          ('séction3', 'öption1')):
+        Option(section, name, 'dēfault-valué')
+    yield config
+    Option.registry = orig
+
+
+@pytest.fixture(scope='class')
+def bool_config(tmp_path_factory):
+    """Configuration with boolean values, written and parsed once."""
+    filename = str(tmp_path_factory.mktemp('pb-bool') / 'plumbum.cfg')
+    _write(filename, ['[a]', 'option = yes', 'option2 = true',
+                      'option3 = eNaBlEd', 'option4 = on',
+                      'option5 = 1', 'option6 = 123', 'option7 = 123.456',
+                      'option8 = disabled', 'option9 = 0',
+                      'option10 = 0.0'])
+    return Configuration(filename)
+
+
+@pytest.fixture(scope='class')
+def number_config(tmp_path_factory):
+    """Configuration with numeric values, written and parsed once."""
+    filename = str(tmp_path_factory.mktemp('pb-number') / 'plumbum.cfg')
+    _write(filename, ['[a]', 'int = 42', 'float = 42.5'])
+    return Configuration(filename)
 
 
 class TestConfiguration(object):
 
-    def setup_method(self, method):
-        self.config = Configuration(None)
-        self.config.parser.add_section('séction1')
-        self.config.parser.set('séction1', 'öption1', 'cönfig-valué')
-        self.config.parser.set('séction1', 'öption4', 'cönfig-valué')
-        parent_config = Configuration(None)
-        parent_config.parser.add_section('séction1')
-        parent_config.parser.add_section('séction2')
-        parent_config.parser.set('séction1', 'öption1', 'cönfig-valué')
-        parent_config.parser.set('séction1', 'öption2', 'înherited-valué')
-        parent_config.parser.set('séction2', 'öption2', 'înherited-valué')
-        self.config.parents = [parent_config]
-
-        class OptionClass(object):
-            Option('séction1', 'öption1', 'dēfault-valué')
-            Option('séction1', 'öption2', 'dēfault-valué')
-            Option('séction1', 'öption3', 'dēfault-valué')
-            Option('séction3', 'öption1', 'dēfault-valué')
-
-    def test_get_from_config(self):
-        """Value is retrieved from the config."""
-        assert self.config.get('séction1', 'öption1') == 'cönfig-valué'
-
-    def test_get_from_inherited(self):
-        """Value not specified in the config is retrieved from the inherited
-        config.
-        """
-        assert self.config.get('séction1', 'öption2') == 'înherited-valué'
+    @pytest.fixture(autouse=True)
+    def config(self, shared_config):
+        """Bind the shared configuration to the test."""
+        self.config = shared_config
 
-    def test_get_from_default(self):
-        """Value not specified in the config or the inherited config is
-        retrieved from the option default.
+    @pytest.fixture
+    def fresh_config(self, shared_config):
+        """Private copy of the shared configuration, for tests modifying
+        it.
+        """
+        return copy.deepcopy(shared_config)
+
+    @pytest.mark.parametrize('option, expected', [
+        ('öption1', 'cönfig-valué'),
+        ('öption2', 'înherited-valué'),
+        ('öption3', 'dēfault-valué'),
+    ], ids=['config', 'inherited', 'default'])
+    def test_get_from(self, option, expected):
+        """Value is retrieved from the config, or else from the inherited
+        config, or else from the option default.
         """
-        assert self.config.get('séction1', 'öption3') == 'dēfault-valué'
+        assert self.config.get('séction1', option) == expected
 
-    def test_get_is_cached(self):
+    def test_get_is_cached(self, fresh_config):
         """Value is cached on first retrieval from the parser."""
-        option1 = self.config.get('séction1', 'öption1')
-        self.config.parser.set('séction1', 'öption1', 'cönfig-valué2')
-        assert self.config.get('séction1', 'öption1') is option1
-
-    def test_contains_from_config(self):
-        """Contains returns `True` for section defined in config."""
-        assert 'séction1' in self.config
-
-    def test_contains_from_inherited(self):
-        """Contains returns `True` for section defined in inherited config."""
-        assert 'séction2' in self.config
+        option1 = fresh_config.get('séction1', 'öption1')
+        fresh_config.parser.set('séction1', 'öption1', 'cönfig-valué2')
+        assert fresh_config.get('séction1', 'öption1') is option1
+
+    @pytest.mark.parametrize('section', ['séction1', 'séction2', 'séction3'],
+                             ids=['config', 'inherited', 'default'])
+    def test_contains_from(self, section):
+        """Contains returns `True` for section defined in config, in inherited
+        config or in an option.
+        """
+        assert section in self.config
 
-    def test_contains_from_default(self):
-        """Contains returns `True` for section defined in an option."""
-        assert 'séction3' in self.config
+    def test_contains_missing(self):
+        """Contains returns `False` for section defined nowhere."""
+        assert 'séction4' not in self.config
 
-    def test_remove_from_config(self):
+    def test_remove_from_config(self, fresh_config):
         """Value is removed from configuration."""
-        self.config.remove('séction1', 'öption4')
-        parser = self.config.parser
+        fresh_config.remove('séction1', 'öption4')
+        parser = fresh_config.parser
         assert parser.has_option('séction1', 'öption4') == False
-        assert self.config.get('séction1', 'öption4') == ''
+        assert fresh_config.get('séction1', 'öption4') == ''
 
-    def test_remove_leaves_inherited_unchanged(self):
+    def test_remove_leaves_inherited_unchanged(self, fresh_config):
         """Value is not removed from inherited configuration."""
-        self.config.remove('séction1', 'öption2')
-        parser = self.config.parents[0].parser
+        fresh_config.remove('séction1', 'öption2')
+        parser = fresh_config.parents[0].parser
         assert parser.has_option('séction1', 'öption1')
-        assert self.config.get('séction1', 'öption2') == 'înherited-valué'
+        assert fresh_config.get('séction1', 'öption2') == 'înherited-valué'
 
 class BaseTest(object):
 
-    def setup_method(self, method):
-        self.tmpdir = mkdtemp()
+    @pytest.fixture(autouse=True)
+    def files(self, tmp_path):
+        """Give each test its own directory, holding an empty config file."""
+        self.tmpdir = str(tmp_path)
         self.filename = os.path.join(self.tmpdir, 'plumbum-test.cfg')
         self.sitename = os.path.join(self.tmpdir, 'plumbum-site.cfg')
-        self.instance = InstanceStub()
         self._write([])
-        self._orig = {
-            'ComponentMeta._components': ComponentMeta._components,
-            'ComponentMeta._registry': ComponentMeta._registry,
-            'ConfigSection.registry': ConfigSection.registry,
-            'Option.registry': Option.registry,
-        }
-        ComponentMeta._components = list(ComponentMeta._components)
-        ComponentMeta._registry = dict((interface, list(classes))
-                                       for interface, classes
-                                       in ComponentMeta._registry.items())
-        ConfigSection.registry = {}
-        Option.registry = {}
-
-    def teardown_method(self, method):
-        ComponentMeta._components = self._orig['ComponentMeta._components']
-        ComponentMeta._registry = self._orig['ComponentMeta._registry']
-        ConfigSection.registry = self._orig['ConfigSection.registry']
-        Option.registry = self._orig['Option.registry']
-        shutil.rmtree(self.tmpdir)
+
+    @pytest.fixture(autouse=True)
+    def registries(self, request):
+        """Give each test its own registries. Only tests marked with
+        `components` get a private component registry.
+        """
+        components = request.node.get_closest_marker('components')
+        with _registry_snapshot(components is not None):
+            yield
 
     def _read(self):
         return Configuration(self.filename)
@@ -220,69 +318,92 @@ class TestIntegration(BaseTest):
         assert config.get('a', 'opt1') == 'file.cfg'
         assert config.getpath('a', 'opt1') != 'file.cfg'
         assert os.path.isabs(config.getpath('a', 'opt1')) is True
-        assert os.path.splitdrive(config.getpath('a', 'opt2'))[1]\
-                .replace('\\', '/') == '/somewhere/file.cfg'
-        assert os.path.splitdrive(config.getpath('a', 'opt3', '/none.cfg'))[1]\
-                .replace('\\', '/') == '/none.cfg'
+        assert _strip_drive(config.getpath('a', 'opt2')) \
+                == '/somewhere/file.cfg'
+        assert _strip_drive(config.getpath('a', 'opt3', '/none.cfg')) \
+                == '/none.cfg'
         assert config.getpath('a', 'opt3', 'none.cfg') != 'none.cfg'
 
     def test_read_and_get(self):
-        self._write(['[a]', 'option = x'])
-        config = self._read()
+        config = Configuration.from_string('[a]\noption = x\n')
         assert config.get('a', 'option') == 'x'
         assert config.get('a', 'option', 'y') == 'x'
         assert config.get('b', 'option2', 'y') == 'y'
 
     def test_read_and_get_unicode(self):
-        self._write(['[ä]', 'öption = x'])
-        config = self._read()
+        config = Configuration.from_string('[ä]\nöption = x\n')
         assert config.get('ä', 'öption') == 'x'
         assert config.get('ä', 'öption', 'y') == 'x'
         assert config.get('b', 'öption2', 'y') == 'y'
 
-    def test_read_and_getbool(self):
-        self._write(['[a]', 'option = yes', 'option2 = true',
-                     'option3 = eNaBlEd', 'option4 = on',
-                     'option5 = 1', 'option6 = 123', 'option7 = 123.456',
-                     'option8 = disabled', 'option9 = 0', 'option10 = 0.0'])
-        config = self._read()
-        assert config.getbool('a', 'option') == True
-        assert config.getbool('a', 'option', False) == True
-        assert config.getbool('a', 'option2') == True
-        assert config.getbool('a', 'option3') == True
-        assert config.getbool('a', 'option4') == True
-        assert config.getbool('a', 'option5') == True
-        assert config.getbool('a', 'option6') == True
-        assert config.getbool('a', 'option7') == True
-        assert config.getbool('a', 'option8') == False
-        assert config.getbool('a', 'option9') == False
-        assert config.getbool('a', 'option10') == False
-        assert config.getbool('b', 'option_b') == False
-        assert config.getbool('b', 'option_b', False) == False
-        assert config.getbool('b', 'option_b', 'disabled') == False
-
-    def test_read_and_getint(self):
-        self._write(['[a]', 'option = 42'])
-        config = self._read()
-        assert config.getint('a', 'option') == 42
-        assert config.getint('a', 'option', 25) == 42
-        assert config.getint('b', 'option2') == 0
-        assert config.getint('b', 'option2', 25) == 25
-        assert config.getint('b', 'option2', '25') == 25
-
-    def test_read_and_getfloat(self):
-        self._write(['[a]', 'option = 42.5'])
-        config = self._read()
-        assert config.getfloat('a', 'option') == 42.5
-        assert config.getfloat('a', 'option', 25.3) == 42.5
-        assert config.getfloat('b', 'option2') == 0
-        assert config.getfloat('b', 'option2', 25.3) == 25.3
-        assert config.getfloat('b', 'option2', 25) == 25.0
-        assert config.getfloat('b', 'option2', '25.3') == 25.3
+    def test_read_and_get_comments(self):
+        config = Configuration.from_string(
+            '# comment\n[a]\n; other comment\n'
+            'option = x\noption2: y\nOPTION3 = %z\n')
+        assert config.get('a', 'option') == 'x'
+        assert config.get('a', 'option2') == 'y'
+        assert config.get('a', 'option3') == '%z'
+
+    def test_read_and_get_unicode_whitespace(self):
+        """Non-ASCII whitespace around names and values is stripped, like
+        `ConfigParser` does.
+        """
+        config = Configuration.from_string(
+            '[a]\noption\xa0=\xa0x\xa0\noption2 =　y z　\n')
+        assert config.get('a', 'option') == 'x'
+        assert config.get('a', 'option2') == 'y z'
+
+    def test_read_and_get_multiline(self):
+        config = Configuration.from_string(
+            '[a]\noption = x\n    y\noption2 = z\n')
+        assert config.get('a', 'option') == 'x\ny'
+        assert config.get('a', 'option2') == 'z'
+
+    @pytest.mark.parametrize('section, option, default, expected', [
+        ('a', 'option', '', True),
+        ('a', 'option', False, True),
+        ('a', 'option2', '', True),
+        ('a', 'option3', '', True),
+        ('a', 'option4', '', True),
+        ('a', 'option5', '', True),
+        ('a', 'option6', '', True),
+        ('a', 'option7', '', True),
+        ('a', 'option8', '', False),
+        ('a', 'option9', '', False),
+        ('a', 'option10', '', False),
+        ('b', 'option_b', '', False),
+        ('b', 'option_b', False, False),
+        ('b', 'option_b', 'disabled', False),
+    ])
+    def test_read_and_getbool(self, bool_config, section, option, default,
+                              expected):
+        assert bool_config.getbool(section, option, default) == expected
+
+    @pytest.mark.parametrize('section, option, args, expected', [
+        ('a', 'int', (), 42),
+        ('a', 'int', (25,), 42),
+        ('b', 'option2', (), 0),
+        ('b', 'option2', (25,), 25),
+        ('b', 'option2', ('25',), 25),
+    ])
+    def test_read_and_getint(self, number_config, section, option, args,
+                             expected):
+        assert number_config.getint(section, option, *args) == expected
+
+    @pytest.mark.parametrize('section, option, args, expected', [
+        ('a', 'float', (), 42.5),
+        ('a', 'float', (25.3,), 42.5),
+        ('b', 'option2', (), 0),
+        ('b', 'option2', (25.3,), 25.3),
+        ('b', 'option2', (25,), 25.0),
+        ('b', 'option2', ('25.3',), 25.3),
+    ])
+    def test_read_and_getfloat(self, number_config, section, option, args,
+                               expected):
+        assert number_config.getfloat(section, option, *args) == expected
 
     def test_read_and_getlist(self):
-        self._write(['[a]', 'option = foo, bar, baz'])
-        config = self._read()
+        config = Configuration.from_string('[a]\noption = foo, bar, baz\n')
         assert config.getlist('a', 'option') == ['foo', 'bar', 'baz']
         assert config.getlist('b', 'option2') == []
         assert config.getlist('b', 'option2', ['foo', 'bar', 'baz'])\
@@ -291,28 +412,25 @@ class TestIntegration(BaseTest):
                 == ['foo', 'bar', 'baz']
 
     def test_read_and_getlist_sep(self):
-        self._write(['[a]', 'option = foo | bar | baz'])
-        config = self._read()
+        config = Configuration.from_string('[a]\noption = foo | bar | baz\n')
         assert config.getlist('a', 'option', sep='|') == ['foo', 'bar', 'baz']
 
     def test_read_and_getlist_keep_empty(self):
-        self._write(['[a]', 'option = ,bar,baz'])
-        config = self._read()
+        config = Configuration.from_string('[a]\noption = ,bar,baz\n')
         assert config.getlist('a', 'option') == ['bar', 'baz']
         assert config.getlist('a', 'option', keep_empty=True)\
                 == ['', 'bar', 'baz']
 
     def test_read_and_getlist_false_values(self):
         config = self._read()
-        values = [None, False, '', 'foo', u'', u'bar',
-                  0, 0, 0.0, 0j, 42, 43.0]
-        assert config.getlist('a', 'false', values)\
-                == [False, 'foo', u'bar', 0, 0, 0.0, 0j, 42, 43.0]
-        assert config.getlist('a', 'false', values, keep_empty=True) == values
+        assert config.getlist('a', 'false', _FALSE_VALUES)\
+                == list(_FALSE_EXPECTED)
+        assert config.getlist('a', 'false', _FALSE_VALUES, keep_empty=True)\
+                == list(_FALSE_VALUES)
 
     def test_read_and_getlist_multi_seps(self):
-        self._write(['[a]', 'option = 42 foo,bar||baz,||blah'])
-        config = self._read()
+        config = Configuration.from_string(
+            '[a]\noption = 42 foo,bar||baz,||blah\n')
 
         expected = ['42', 'foo', 'bar', 'baz', 'blah']
         assert config.getlist('a', 'option', '', sep=(' ', ',', '||'))\
@@ -350,6 +468,7 @@ class TestIntegration(BaseTest):
         with pytest.raises(ConfigurationError):
             getattr(foo, 'invalid')
 
+    @pytest.mark.components
     def test_read_and_getextensionoption(self):
         self._write(['[a]', 'option = ImplA', 'invalid = ImplB'])
         config = self._read()
@@ -371,10 +490,11 @@ class TestIntegration(BaseTest):
             def __init__(self):
                 self.config = config
 
-        self.instance.enable_component(ImplA)
-        self.instance.enable_component(Foo)
+        instance = InstanceStub()
+        instance.enable_component(ImplA)
+        instance.enable_component(Foo)
 
-        foo = Foo(self.instance)
+        foo = Foo(instance)
         with pytest.raises(ConfigurationError):
             foo.default1
         assert isinstance(foo.default2, ImplA)
@@ -384,6 +504,7 @@ class TestIntegration(BaseTest):
         with pytest.raises(ConfigurationError):
             foo.invalid
 
+    @pytest.mark.components
     def test_read_and_getorderedextensionsoption(self):
         self._write(['[a]', 'option = ImplA, ImplB',
                      'invalid = ImplB, ImplD'])
@@ -415,12 +536,13 @@ class TestIntegration(BaseTest):
             def __init__(self):
                 self.config = config
 
-        self.instance.enable_component(ImplA)
-        self.instance.enable_component(ImplB)
-        self.instance.enable_component(ImplC)
-        self.instance.enable_component(Foo)
+        instance = InstanceStub()
+        instance.enable_component(ImplA)
+        instance.enable_component(ImplB)
+        instance.enable_component(ImplC)
+        instance.enable_component(Foo)
 
-        foo = Foo(self.instance)
+        foo = Foo(instance)
         assert foo.default1 == []
         assert len(foo.default2) == 3
         assert isinstance(foo.default2[0], ImplA)
@@ -499,6 +621,26 @@ class TestIntegration(BaseTest):
         assert config2.get(u'aä', 'option2') == "Voilà l'été"
         # assert config2.get('a', 'option3') == "Voilà l'été"
 
+    def test_update_and_save(self):
+        config = self._read()
+        assert config.get('a', 'option') == ''
+        config.update({'a': {'option': 'x', 'öption2': None},
+                       u'bä': {'option': 42}})
+        assert config.get('a', 'option') == 'x'
+        assert config.get('a', 'öption2') == ''
+        assert config.get(u'bä', 'option') == '42'
+        config.save()
+
+        assert readlines(self.filename) == _SAVED_HEADER + [
+            '[a]\n',
+            'option = x\n',
+            'öption2 = \n',
+            '\n',
+            '[bä]\n',
+            'option = 42\n',
+            '\n',
+        ]
+
     def test_set_and_save_inherit(self):
         with self.inherited_file():
             self._write(['[a]', 'option = x'], site=True)
@@ -536,7 +678,7 @@ class TestIntegration(BaseTest):
             assert config.get('a', u'ôption') == 'x'
             config.save()
 
-            assert read_file(self.filename) == (
+            assert _read(self.filename) == (
                 '# -*- coding: utf-8 -*-\n'
                 '\n'
                 '[inherit]\n'
@@ -546,7 +688,7 @@ class TestIntegration(BaseTest):
             config.set('a', u'ôption', 'y')
             config.save()
 
-            assert read_file(self.filename) == (
+            assert _read(self.filename) == (
                 '# -*- coding: utf-8 -*-\n'
                 '\n'
                 '[a]\n'
@@ -558,7 +700,7 @@ class TestIntegration(BaseTest):
 
             config.set('a', u'ôption', 'x')
             config.save()
-            assert read_file(self.filename) == (
+            assert _read(self.filename) == (
                 '# -*- coding: utf-8 -*-\n'
                 '\n'
                 '[inherit]\n'
@@ -592,6 +734,21 @@ class TestIntegration(BaseTest):
         assert foo.section_c is config['c']
         assert foo.section_c.get('option') == 'value'
 
+    def test_sections_str_subclass(self):
+        class Name(str):
+            pass
+
+        config = self._read()
+
+        class Foo(object):
+            section_c = ConfigSection(Name('c'), 'Doc for c')
+            option_c = Option(Name('c'), Name('option'), 'value')
+
+        assert Foo.section_c.name == 'c'
+        assert Foo.option_c.name == 'option'
+        assert config.get('c', 'option') == 'value'
+        assert config[Name('c')].name == 'c'
+
     def test_sections_unicode(self):
         self._write([u'[aä]', u'öption = x', '[b]', 'option = y'])
         config = self._read()
@@ -671,6 +828,34 @@ class TestIntegration(BaseTest):
         config.parse_if_needed()
         assert config.get('a', 'option') == 'y'
 
+    def test_reparse_renamed_file(self):
+        """A file replaced by a rename is parsed again, even when its
+        modification time and size are unchanged.
+        """
+        self._write(['[a]', 'option = x'])
+        config = self._read()
+        assert config.get('a', 'option') == 'x'
+
+        st = os.stat(self.filename)
+        newname = self.filename + '.new'
+        _write(newname, ['[a]', 'option = y'])
+        os.utime(newname, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.rename(newname, self.filename)
+        assert config.parse_if_needed() is True
+        assert config.get('a', 'option') == 'y'
+        assert self._read().get('a', 'option') == 'y'
+
+    def test_reparse_unchanged_file_isolated(self):
+        """Configurations read from the same unchanged file don't share
+        state.
+        """
+        self._write(['[a]', 'option = x'])
+        config1 = self._read()
+        config2 = self._read()
+        config1.set('a', 'option', 'y')
+        assert config2.get('a', 'option') == 'x'
+        assert self._read().get('a', 'option') == 'x'
+
     def test_inherit_reparse(self):
         with self.inherited_file():
             self._write(['[a]', 'option = x'], site=True)
@@ -695,16 +880,18 @@ class TestIntegration(BaseTest):
     def test_inherit_multiple(self):
         class Foo(object):
             option_b = Option('b', 'option2', 'default')
-        base = os.path.dirname(self.filename)
-        relsite1 = os.path.join('sub1', 'trac-site1.cfg')
-        site1 = os.path.join(base, relsite1)
-        relsite2 = os.path.join('sub2', 'trac-site2.cfg')
-        site2 = os.path.join(base, relsite2)
-        os.mkdir(os.path.dirname(site1))
+        join = os.path.join
+        base = self.tmpdir
+        sub1, sub2 = join(base, 'sub1'), join(base, 'sub2')
+        relsite1 = join('sub1', 'trac-site1.cfg')
+        site1 = join(base, relsite1)
+        relsite2 = join('sub2', 'trac-site2.cfg')
+        site2 = join(base, relsite2)
+        os.mkdir(sub1)
         create_file(site1, '[a]\noption1 = x\n'
                            '[c]\noption = 1\npath1 = site1\n')
         try:
-            os.mkdir(os.path.dirname(site2))
+            os.mkdir(sub2)
             create_file(site2, '[b]\noption2 = y\n'
                                '[c]\noption = 2\npath2 = site2\n')
             try:
@@ -714,19 +901,17 @@ class TestIntegration(BaseTest):
                 assert config.get('a', 'option1') == 'x'
                 assert config.get('b', 'option2') == 'y'
                 assert config.get('c', 'option') == '1'
-                assert config.getpath('c', 'path1') == \
-                       os.path.join(base, 'site1')
-                assert config.getpath('c', 'path2') == \
-                       os.path.join(base, 'site2')
+                assert config.getpath('c', 'path1') == join(base, 'site1')
+                assert config.getpath('c', 'path2') == join(base, 'site2')
                 assert config.getpath('c', 'path3') == ''
                 assert config.getpath('c', 'path4', 'site4') == \
-                       os.path.join(base, 'site4')
+                       join(base, 'site4')
             finally:
                 os.remove(site2)
-                os.rmdir(os.path.dirname(site2))
+                os.rmdir(sub2)
         finally:
             os.remove(site1)
-            os.rmdir(os.path.dirname(site1))
+            os.rmdir(sub1)
 
     def test_option_with_raw_default(self):
         class Foo(object):
@@ -746,20 +931,19 @@ class TestIntegration(BaseTest):
         config = self._read()
         config.set_defaults()
         config.save()
-        with open(self.filename, 'r') as f:
-            assert next(f) == '# -*- coding: utf-8 -*-\n'
-            assert next(f) == '\n'
-            assert next(f) == '[a]\n'
-            assert next(f) == 'blah = Blàh!\n'
-            assert next(f) == 'choice = -42\n'
-            assert next(f) == 'false = disabled\n'
-            assert next(f) == 'list = #cc0|4.2|42|0||enabled|disabled|\n'
-            assert next(f) == 'list-seps = #cc0,4.2,42,0,,enabled,disabled,\n'
-            assert next(f) == 'none = \n'
-            assert next(f) == 'true = enabled\n'
-            assert next(f) == '\n'
-            with pytest.raises(StopIteration):
-                next(f)
+        assert _read(self.filename) == (
+            '# -*- coding: utf-8 -*-\n'
+            '\n'
+            '[a]\n'
+            'blah = Blàh!\n'
+            'choice = -42\n'
+            'false = disabled\n'
+            'list = #cc0|4.2|42|0||enabled|disabled|\n'
+            'list-seps = #cc0,4.2,42,0,,enabled,disabled,\n'
+            'none = \n'
+            'true = enabled\n'
+            '\n'
+        )
 
     def test_unicode_option_with_raw_default(self):
         class Foo(object):
@@ -776,19 +960,18 @@ class TestIntegration(BaseTest):
         config = self._read()
         config.set_defaults()
         config.save()
-        with open(self.filename, 'r') as f:
-            assert next(f) == '# -*- coding: utf-8 -*-\n'
-            assert next(f) == '\n'
-            assert next(f) == '[résumé]\n'
-            assert next(f) == 'bláh = Blàh!\n'
-            assert next(f) == 'chöicé = -42\n'
-            assert next(f) == 'fálsé = disabled\n'
-            assert next(f) == 'liśt = #ccö|4.2|42|0||enabled|disabled|\n'
-            assert next(f) == 'nöné = \n'
-            assert next(f) == 'trüé = enabled\n'
-            assert next(f) == '\n'
-            with pytest.raises(StopIteration):
-                next(f)
+        assert _read(self.filename) == (
+            '# -*- coding: utf-8 -*-\n'
+            '\n'
+            '[résumé]\n'
+            'bláh = Blàh!\n'
+            'chöicé = -42\n'
+            'fálsé = disabled\n'
+            'liśt = #ccö|4.2|42|0||enabled|disabled|\n'
+            'nöné = \n'
+            'trüé = enabled\n'
+            '\n'
+        )
 
     def test_option_with_non_normal_default(self):
         class Foo(object):
@@ -799,27 +982,14 @@ class TestIntegration(BaseTest):
             option_bool_yes = BoolOption('a', 'bool-yes', 'yes')
             option_bool_no = BoolOption('a', 'bool-no', 'no')
 
-        expected = [
-            '# -*- coding: utf-8 -*-\n',
-            '\n',
-            '[a]\n',
-            'bool-0 = disabled\n',
-            'bool-1 = enabled\n',
-            'bool-no = disabled\n',
-            'bool-yes = enabled\n',
-            'float-0 = 0.0\n',
-            'int-0 = 0\n',
-            '\n',
-        ]
-
         config = self._read()
         config.set_defaults()
         config.save()
-        assert readlines(self.filename) == expected
+        assert _read_bytes(self.filename) == _SAVED_NON_NORMAL
 
         config.set('a', 'bool-1', 'True')
         config.save()
-        assert readlines(self.filename) == expected
+        assert _read_bytes(self.filename) == _SAVED_NON_NORMAL
 
     def test_save_changes_mtime(self):
         """Test that each save operation changes the file modification time."""
@@ -831,27 +1001,41 @@ class TestIntegration(BaseTest):
         rconfig = self._read()
         assert rconfig.getint('section', 'option') == 1
         sconfig.set('section', 'option', 2)
-        time.sleep(1.0 - time_now() % 1.0)
         sconfig.save()
         rconfig.parse_if_needed()
         assert rconfig.getint('section', 'option') == 2
 
+    def test_save_unchanged_keeps_mtime(self):
+        """Test that saving without changes leaves the file untouched."""
+        config = self._read()
+        config.set('a', 'option', 'x')
+        config.save()
+        mtime = os.stat(self.filename).st_mtime_ns
+        config.save()
+        assert os.stat(self.filename).st_mtime_ns == mtime
+
     def test_touch_changes_mtime(self):
         """Test that each touch command changes the file modification time."""
         config = self._read()
-        time.sleep(1.0 - time_now() % 1.0)
-        config.touch()
-        mtime = os.stat(self.filename).st_mtime
-        config.touch()
-        assert os.stat(self.filename).st_mtime != mtime
+        fd = os.open(self.filename, os.O_RDONLY)
+        try:
+            config.touch()
+            mtime = os.fstat(fd).st_mtime_ns
+            config.touch()
+            assert os.fstat(fd).st_mtime_ns != mtime
+        finally:
+            os.close(fd)
 
 
-class ConfigurationSetDefaultsTestCase(BaseTest):
+@pytest.mark.components
+class TestConfigurationSetDefaults(BaseTest):
     """Tests for the `set_defaults` method of the `Configuration` class."""
 
-    def setup_method(self, method):
-        super(ConfigurationSetDefaultsTestCase, self).setup_method(method)
-
+    @pytest.fixture(autouse=True)
+    def components(self, registries):
+        """Declare the components whose defaults are written, in the
+        registries of the test.
+        """
         class CompA(Component):
             opt1 = Option('compa', 'opt1', 1)
             opt2 = Option('compa', 'opt2', 'a')
@@ -860,105 +1044,44 @@ class ConfigurationSetDefaultsTestCase(BaseTest):
             opt3 = Option('compb', 'opt3', 2)
             opt4 = Option('compb', 'opt4', 'b')
 
-    def test_component_module_no_match(self):
-        """No defaults written if component doesn't match."""
-        config = self._read()
-        config.set_defaults(component='trac.tests.conf')
-        config.save()
-
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
-
-    def test_component_class_no_match(self):
-        """No defaults written if module doesn't match."""
-        config = self._read()
-        config.set_defaults(component='trac.tests.conf.CompC')
-        config.save()
-
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
-
-    def test_component_module_match(self):
-        """Defaults of components in matching module are written."""
-        config = self._read()
-        config.set_defaults(component='trac.tests.config')
-        config.save()
-
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compa]\n'
-            assert f.next() == 'opt1 = 1\n'
-            assert f.next() == 'opt2 = a\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compb]\n'
-            assert f.next() == 'opt3 = 2\n'
-            assert f.next() == 'opt4 = b\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
-
-    def test_component_module_wildcard_match(self):
-        """Defaults of components in matching module are written.
-        Trailing dot-star are stripped in performing match.
+    @pytest.mark.parametrize('component, expected', [
+        # No defaults written if component doesn't match
+        ('tests.test_conf', _SAVED_HEADER),
+        # No defaults written if module doesn't match
+        ('tests.test_conf.CompC', _SAVED_HEADER),
+        # Defaults of components in matching module are written
+        ('tests.test_config', _SAVED_HEADER + _SAVED_COMPA + _SAVED_COMPB),
+        # Trailing dot-star are stripped in performing match
+        ('tests.test_config.*',
+         _SAVED_HEADER + _SAVED_COMPA + _SAVED_COMPB),
+        # Defaults of matching component are written
+        ('tests.test_config.CompA', _SAVED_HEADER + _SAVED_COMPA),
+    ], ids=['module_no_match', 'class_no_match', 'module_match',
+            'module_wildcard_match', 'class_match'])
+    def test_component(self, component, expected):
+        """Only the defaults of the components matching `component` are
+        written.
         """
         config = self._read()
-        config.set_defaults(component='trac.tests.config.*')
-        config.save()
-
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compa]\n'
-            assert f.next() == 'opt1 = 1\n'
-            assert f.next() == 'opt2 = a\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compb]\n'
-            assert f.next() == 'opt3 = 2\n'
-            assert f.next() == 'opt4 = b\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
-
-    def test_component_class_match(self):
-        """Defaults of matching component are written."""
-        config = self._read()
-        config.set_defaults(component='trac.tests.config.CompA')
+        config.set_defaults(component=component)
         config.save()
 
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compa]\n'
-            assert f.next() == 'opt1 = 1\n'
-            assert f.next() == 'opt2 = a\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
+        assert readlines(self.filename) == expected
 
     def test_component_no_overwrite(self):
         """Values in configuration are not overwritten."""
         config = self._read()
         config.set('compa', 'opt1', 3)
         config.save()
-        config.set_defaults(component='trac.tests.config.CompA')
+        config.set_defaults(component='tests.test_config.CompA')
         config.save()
 
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compa]\n'
-            assert f.next() == 'opt1 = 3\n'
-            assert f.next() == 'opt2 = a\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
+        assert readlines(self.filename) == _SAVED_HEADER + [
+            '[compa]\n',
+            'opt1 = 3\n',
+            'opt2 = a\n',
+            '\n',
+        ]
 
     def test_component_no_overwrite_parent(self):
         """Values in parent configuration are not overwritten."""
@@ -966,29 +1089,23 @@ class ConfigurationSetDefaultsTestCase(BaseTest):
         parent_config.set('compa', 'opt1', 3)
         parent_config.save()
         config = self._read()
-        config.set('inherit', 'file', 'trac-site.cfg')
+        config.set('inherit', 'file', 'plumbum-site.cfg')
         config.save()
         config.parse_if_needed(True)
-        config.set_defaults(component='trac.tests.config.CompA')
+        config.set_defaults(component='tests.test_config.CompA')
         config.save()
 
-        with open(self.sitename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compa]\n'
-            assert f.next() == 'opt1 = 3\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
-
-        with open(self.filename, 'r') as f:
-            assert f.next() == '# -*- coding: utf-8 -*-\n'
-            assert f.next() == '\n'
-            assert f.next() == '[compa]\n'
-            assert f.next() == 'opt2 = a\n'
-            assert f.next() == '\n'
-            assert f.next() == '[inherit]\n'
-            assert f.next() == 'file = trac-site.cfg\n'
-            assert f.next() == '\n'
-            with pytest.raises(StopIteration):
-                f.next()
+        assert readlines(self.sitename) == _SAVED_HEADER + [
+            '[compa]\n',
+            'opt1 = 3\n',
+            '\n',
+        ]
+
+        assert readlines(self.filename) == _SAVED_HEADER + [
+            '[compa]\n',
+            'opt2 = a\n',
+            '\n',
+            '[inherit]\n',
+            'file = plumbum-site.cfg\n',
+            '\n',
+        ]
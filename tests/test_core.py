@@ -28,12 +28,16 @@ class TestComponent(object):
         self.compmgr = ComponentManager()
 
         # Make sure we have not external components hanging around in the
-        # component registry
+        # component registry, and that the classes defined by the test don't
+        # pile up in the list of components
         self.old_registry = ComponentMeta._registry
+        self.old_components = ComponentMeta._components
         ComponentMeta._registry = {}
+        ComponentMeta._components = ComponentMeta._components.copy()
 
     def teardown_method(self, method):
         ComponentMeta._registry = self.old_registry
+        ComponentMeta._components = self.old_components
 
     def test_base_class_not_registered(self):
         """Make sure that the Component base class does not appear in the
@@ -155,7 +159,7 @@ class TestComponent(object):
             implements(ITest)
         tests = iter(ComponentA(self.compmgr).tests)
         with pytest.raises(AttributeError):
-            tests.next().test()
+            next(tests).test()
 
     def test_extension_point_with_no_extension(self):
         """Verify that accessing an extension point with no extenders returns
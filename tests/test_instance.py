@@ -6,11 +6,12 @@ import pytest
 from configparser import ConfigParser
 
 from plumbum.core import PlumbumError, ComponentManager, Component, implements
-from plumbum.instance import PlumbumInstance, open_instance
+from plumbum.instance import _VERSION, PlumbumInstance, open_instance
 from plumbum.config import ConfigurationError
 from plumbum.api import IInstanceSetupParticipant
+from plumbum.util.file import create_file
 
-from tests.utils import mkdtemp
+from tests.utils import mkdtemp, shm_dir
 
 
 class InstanceCreatedWithoutData(PlumbumInstance):
@@ -29,54 +30,75 @@ class InstanceCreatedWithoutData(PlumbumInstance):
 
 
 def test_empty_instance():
-    path = mkdtemp()
+    path = mkdtemp(shm_dir())
     instance = InstanceCreatedWithoutData(path, create=True)
     assert instance.database_version is False
     instance.shutdown()
     shutil.rmtree(instance.path)
 
 
+def test_missing_configfile_raises_plumbum_error():
+    """PlumbumError is raised when config file is missing."""
+    # Only the VERSION file is needed to get past the instance check
+    path = mkdtemp(shm_dir())
+    try:
+        create_file(os.path.join(path, 'VERSION'), _VERSION + '\n')
+        with pytest.raises(PlumbumError, match='configuration file'):
+            PlumbumInstance(path)
+    finally:
+        shutil.rmtree(path)
+
+
+@pytest.fixture(scope='module')
+def created_instance():
+    """Instance created once for the tests that only read its files."""
+    instance = PlumbumInstance(mkdtemp(shm_dir()), create=True)
+    instance.config.save()
+    yield instance
+    instance.shutdown()
+    shutil.rmtree(instance.path)
+
+
+def test_dumped_values_in_plumbumini(created_instance):
+    parser = ConfigParser()
+    filename = created_instance.config.filename
+    assert parser.read(filename) == [filename]
+    #assert parser.get('revisionlog', 'graph_colors') == \
+    #        "#cc0,#0c0,#0cc,#00c,#c0c,#c00"
+    #assert parser.get('plumbum', 'secure_cookies') == 'disabled'
+
+
+def test_dumped_values_in_plumbumini_sample(created_instance):
+    parser = ConfigParser()
+    filename = created_instance.config.filename + '.sample'
+    assert parser.read(filename) == [filename]
+    #assert parser.get('revisionlog', 'graph_colors') == \
+    #        "#cc0,#0c0,#0cc,#00c,#c0c,#c00"
+    #assert parser.get('plumbum', 'secure_cookies') == 'disabled'
+    assert parser.has_option('logging', 'log_format')
+    assert parser.get('logging', 'log_format') == ''
+
+
 class TestPlumbumInstance(object):
 
     def setup_method(self):
-        instance_path = mkdtemp()
-        self.instance = PlumbumInstance(instance_path, create=True)
+        # The instance files only live for one test, keep them in memory
+        # when possible
+        instance_path = mkdtemp(shm_dir())
+        self.instance = PlumbumInstance(instance_path, create=True,
+                                        create_sample=False)
         self.instance.config.save()
 
     def teardown_method(self):
         self.instance.shutdown()
         shutil.rmtree(self.instance.path)
 
-    def test_missing_configfile_raises_plumbum_error(self):
-        """PlumbumError is raised when config file is missing."""
-        os.remove(self.instance.config_file_path)
-        with pytest.raises(PlumbumError):
-            PlumbumInstance(self.instance.path)
-
     # Some test with database versions
 
     def test_is_component_enabled(self):
         assert PlumbumInstance.required is True
         assert self.instance.is_component_enabled(PlumbumInstance)
 
-    def test_dumped_values_in_plumbumini(self):
-        parser = ConfigParser()
-        filename = self.instance.config.filename
-        assert parser.read(filename) == [filename]
-        #assert parser.get('revisionlog', 'graph_colors') == \
-        #        "#cc0,#0c0,#0cc,#00c,#c0c,#c00"
-        #assert parser.get('plumbum', 'secure_cookies') == 'disabled'
-
-    def test_dumped_values_in_plumbumini_sample(self):
-        parser = ConfigParser()
-        filename = self.instance.config.filename + '.sample'
-        assert parser.read(filename) == [filename]
-        #assert parser.get('revisionlog', 'graph_colors') == \
-        #        "#cc0,#0c0,#0cc,#00c,#c0c,#c00"
-        #assert parser.get('plumbum', 'secure_cookies') == 'disabled'
-        assert parser.has_option('logging', 'log_format')
-        assert parser.get('logging', 'log_format') == ''
-
     def test_invalid_log_level_raises_exception(self):
         self.instance.config.set('logging', 'log_level', 'invalid')
         self.instance.config.save()
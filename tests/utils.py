@@ -5,10 +5,15 @@ import os.path
 import tempfile
 import logging
 
+import plumbum
 from plumbum.core import ComponentManager
 from plumbum.config import Configuration
 from plumbum.instance import PlumbumInstance
 
+# Default location of `InstanceStub` instances
+_PLUMBUM_DIR = os.path.normpath(os.path.normcase(
+    os.path.abspath(os.path.dirname(plumbum.__file__))))
+
 
 class InstanceStub(PlumbumInstance):
     """A stub of the plumbum.instance.Instance class for testing."""
@@ -42,27 +47,29 @@ class InstanceStub(PlumbumInstance):
         self._old_registry = None
         self._old_components = None
 
-        import plumbum
-        self.path = path
-        if self.path is None:
-            self.path = os.path.abspath(os.path.dirname(plumbum.__file__))
-        self.path = os.path.normpath(os.path.normcase(self.path))
+        if path is None:
+            self.path = _PLUMBUM_DIR
+        else:
+            self.path = os.path.normpath(os.path.normcase(path))
 
         # -- configuration
         self.config = Configuration(None)
-        self.config.set('logging', 'log_level', 'DEBUG')
-        self.config.set('logging', 'log_type', 'none') # Ignored.
-
+        components = {}
         if enable is not None:
-            self.config.set('components', 'plumbum.*', 'disabled')
+            components['plumbum.*'] = 'disabled'
         else:
-            self.config.set('components', 'pbopts.vc.*', 'enabled')
+            components['pbopts.vc.*'] = 'enabled'
         for name_or_class in enable or ():
             config_key = self._component_name(name_or_class)
-            self.config.set('components', config_key, 'enalbed')
+            components[config_key] = 'enalbed'
         for name_or_class in disable or ():
             config_key = self._component_name(name_or_class)
-            self.config.set('components', config_key, 'disabled')
+            components[config_key] = 'disabled'
+        self.config.update({
+            'logging': {'log_level': 'DEBUG',
+                        'log_type': 'none'}, # Ignored.
+            'components': components,
+        })
 
         # -- logging
         self.log = logging.getLogger('plumbum.test')
@@ -117,8 +124,40 @@ class InstanceStub(PlumbumInstance):
         return PlumbumInstance.is_component_enabled(self, cls)
 
 
-def mkdtemp():
+class CopyOnWriteRegistry(dict):
+    """Shallow copy of a `ComponentMeta._registry`-like dict of lists.
+
+    The lists are shared with the original dict until they are retrieved
+    through `setdefault`, which is how `ComponentMeta` gets the list it
+    appends to; only then the list for that key is copied.
+    """
+
+    def __init__(self, registry):
+        dict.__init__(self, registry)
+        self._copied = set()
+
+    def setdefault(self, key, default=None):
+        if key not in self._copied:
+            self._copied.add(key)
+            if key in self:
+                self[key] = self[key].copy()
+        return dict.setdefault(self, key, default)
+
+
+def mkdtemp(dir=None):
     """Create a temp directory with prefix `pb-testdir-` and return the
     directory name.
+
+    :param dir: the directory where to create it, defaults to the system
+                temp directory.
+    """
+    return os.path.realpath(tempfile.mkdtemp(prefix='pb-testdir-', dir=dir))
+
+
+def shm_dir():
+    """Return the memory-backed `/dev/shm` directory if it is writable, or
+    `None`.
     """
-    return os.path.realpath(tempfile.mkdtemp(prefix='pb-testdir-'))
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return None